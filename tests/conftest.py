@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# FileManager.py is a single script at the repository root, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FileManager as fm
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path_factory, monkeypatch):
+    """Keeps indexes, journals and trash folders out of the real ~/.filemanager."""
+    path = tmp_path_factory.mktemp("data")
+    for name, leaf in [("DATA_DIR", ""), ("INDEX_FILE", "file_index.db"), ("THUMBNAIL_DIR", "thumbnails"),
+                       ("MOVE_JOURNAL_DIR", "moves"), ("TRASH_DIR", "trash"),
+                       ("TRASH_ROOTS_FILE", "trash_roots.json"), ("BENCH_BASELINE_FILE", "bench_baseline.json")]:
+        monkeypatch.setattr(fm, name, str(path / leaf) if leaf else str(path))
+    return path
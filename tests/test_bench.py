@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+import FileManager as fm
+
+
+def test_generated_trees_are_reproducible(tmp_path):
+    first = fm.generate_bench_tree(str(tmp_path / "one"), "small", scale=0.1)
+    second = fm.generate_bench_tree(str(tmp_path / "two"), "small", scale=0.1)
+    assert first == second
+    assert first["dirs"] == 1 + 20 + 20 * 20
+    assert sorted(os.listdir(tmp_path / "one")) == sorted(os.listdir(tmp_path / "two"))
+
+
+def test_bench_tree_is_reused(tmp_path):
+    root, summary, reused = fm.bench_tree(str(tmp_path), "deep", scale=0.1)
+    assert not reused
+    assert fm.bench_tree(str(tmp_path), "deep", scale=0.1) == (root, summary, True)
+    assert fm.bench_tree(str(tmp_path), "deep", scale=0.2)[2] is False
+
+
+@pytest.mark.parametrize("operation", fm.BENCH_OPERATIONS)
+def test_every_operation_runs(tmp_path, operation):
+    root, summary, _ = fm.bench_tree(str(tmp_path), "small", scale=0.1)
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    result = fm.time_bench_operation(operation, root, summary, str(scratch), runs=1)
+    assert result["items"] > 0 and result["seconds"] > 0 and result["peak_bytes"] > 0
+    assert os.listdir(scratch) == [] # Pasted copies are removed
+
+
+def result(seconds, peak_bytes=0):
+    return {"shape": "small", "operation": "list", "seconds": seconds, "peak_bytes": peak_bytes}
+
+
+@pytest.mark.parametrize("seconds, peak_bytes, status", [
+    (1.0, 0, "ok"),
+    (1.5, 0, "regressed"),
+    (0.5, 0, "faster"),
+    (1.0, 10 << 20, "regressed"),
+])
+def test_compare_with_baseline(seconds, peak_bytes, status):
+    baseline = {"results": {"small/list": result(1.0, 4 << 20)}}
+    assert fm.compare_bench_result(result(seconds, peak_bytes), baseline)["status"] == status
+    assert fm.compare_bench_result(result(seconds), None)["status"] == "new"
+
+
+def test_small_differences_are_noise():
+    baseline = {"results": {"small/list": result(0.001)}}
+    assert fm.compare_bench_result(result(0.01), baseline)["status"] == "ok"
+
+
+def test_baseline_round_trip(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    fm.save_bench_baseline([dict(result(1.0), items=10, bytes=0)], scale=1.0, seed=1, path=path)
+    fm.save_bench_baseline([dict(result(2.0), operation="find", items=10, bytes=0)], scale=1.0, seed=1, path=path)
+    baseline = fm.load_bench_baseline(path)
+    assert sorted(baseline["results"]) == ["small/find", "small/list"]
+    fm.save_bench_baseline([dict(result(3.0), items=10, bytes=0)], scale=2.0, seed=1, path=path)
+    assert sorted(fm.load_bench_baseline(path)["results"]) == ["small/list"] # Another scale starts over
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import FileManager as fm
+
+
+def find_groups(root):
+    job = fm.DuplicateFinderJob(str(root), workers=2).start()
+    groups = []
+    while True:
+        group = job.groups.get(timeout=30)
+        if group is None:
+            return groups
+        groups.append(group)
+
+
+@pytest.fixture
+def pair(tmp_path):
+    (tmp_path / "a.txt").write_bytes(b"same contents\n" * 100)
+    (tmp_path / "b.txt").write_bytes(b"same contents\n" * 100)
+    (tmp_path / "c.txt").write_bytes(b"other contents\n")
+    groups = find_groups(tmp_path)
+    assert len(groups) == 1
+    keep, other = groups[0]
+    assert (os.path.basename(keep.path), os.path.basename(other.path)) == ("a.txt", "b.txt")
+    return keep, other
+
+
+def test_finds_identical_files_once_per_inode(tmp_path):
+    (tmp_path / "a").write_bytes(b"x" * 5000)
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b").write_bytes(b"x" * 5000)
+    os.link(tmp_path / "a", tmp_path / "a-link")
+    (tmp_path / "c").write_bytes(b"y" * 5000)
+    groups = find_groups(tmp_path)
+    assert len(groups) == 1
+    assert len(groups[0]) == 2
+
+
+def test_remove_duplicates(pair):
+    keep, other = pair
+    removed, problems = fm.remove_duplicates(keep, [keep, other])
+    assert removed == [other.path]
+    assert problems == []
+    assert os.path.exists(keep.path)
+    assert not os.path.exists(other.path)
+
+
+def test_remove_duplicates_keeps_everything_if_keep_was_deleted(pair):
+    keep, other = pair
+    os.remove(keep.path)
+    removed, problems = fm.remove_duplicates(keep, [other])
+    assert removed == []
+    assert len(problems) == 1
+    assert os.path.exists(other.path)
+
+
+def test_remove_duplicates_keeps_everything_if_keep_was_modified(pair):
+    keep, other = pair
+    with open(keep.path, "ab") as f:
+        f.write(b"edited\n")
+    removed, problems = fm.remove_duplicates(keep, [other])
+    assert removed == []
+    assert problems
+    assert os.path.exists(other.path)
+
+
+def test_remove_duplicates_skips_changed_copies(pair):
+    keep, other = pair
+    with open(other.path, "ab") as f:
+        f.write(b"edited\n")
+    removed, problems = fm.remove_duplicates(keep, [other])
+    assert removed == []
+    assert problems
+    assert os.path.exists(other.path)
+
+
+def test_link_duplicates(pair):
+    keep, other = pair
+    linked, problems = fm.link_duplicates(keep, [keep, other])
+    assert linked == [other.path]
+    assert problems == []
+    assert os.path.samefile(keep.path, other.path)
+    assert not [name for name in os.listdir(os.path.dirname(keep.path)) if ".fm-link-" in name]
+
+
+def test_link_duplicates_keeps_copies_if_keep_was_deleted(pair):
+    keep, other = pair
+    os.remove(keep.path)
+    linked, problems = fm.link_duplicates(keep, [other])
+    assert linked == []
+    assert problems
+    assert os.path.exists(other.path)
@@ -0,0 +1,213 @@
+import errno
+import os
+import time
+
+import pytest
+
+import FileManager as fm
+
+
+@pytest.fixture
+def folder(tmp_path):
+    root = tmp_path / "cwd"
+    root.mkdir()
+    (root / "docs").mkdir()
+    (root / "b.txt").write_bytes(b"x" * 300)
+    (root / "a.py").write_bytes(b"x" * 10)
+    (root / "c.png").write_bytes(b"x" * 2000)
+    for age, name in enumerate(["c.png", "a.py", "b.txt"]):
+        stamp = time.time() - 3600 * (age + 1)
+        os.utime(root / name, (stamp, stamp))
+    return root
+
+
+@pytest.fixture
+def model(folder):
+    model = fm.FileSystemModel(str(folder), trash=fm.Trash(purge_delay=60), use_index=False)
+    yield model
+    model.trash.purge_now()
+
+
+def names(entries):
+    return [entry.name for entry in entries]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+# Listing, filter and sort
+
+def test_list_directory(model):
+    assert names(model.list_directory()) == ["docs", "a.py", "b.txt", "c.png"]
+    assert names(model.view()) == ["docs", "a.py", "b.txt", "c.png"]
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("Name (Z-A)", ["docs", "c.png", "b.txt", "a.py"]),
+    ("Size (Asc)", ["docs", "a.py", "b.txt", "c.png"]),
+    ("Size (Desc)", ["docs", "c.png", "b.txt", "a.py"]),
+    ("Date (Old-New)", ["docs", "b.txt", "a.py", "c.png"]),
+    ("Date (New-Old)", ["docs", "c.png", "a.py", "b.txt"]),
+    ("Type", ["docs", "c.png", "a.py", "b.txt"]),
+])
+def test_sort(model, mode, expected):
+    model.list_directory()
+    view = model.set_sort(mode)
+    if view is None: # The unstat'ed listing can't serve a size/date sort
+        view = model.list_directory()
+    assert names(view) == expected
+
+
+@pytest.mark.parametrize("mode, expected", [
+    ("Python Files", ["docs", "a.py"]),
+    ("Text Files", ["docs", "b.txt"]),
+    ("Images", ["docs", "c.png"]),
+])
+def test_filter(model, mode, expected):
+    model.list_directory()
+    model.set_filter(mode)
+    assert names(model.list_directory()) == expected
+    model.set_filter("All Files")
+    assert names(model.list_directory()) == ["docs", "a.py", "b.txt", "c.png"]
+
+
+def test_unknown_modes_are_rejected(model):
+    with pytest.raises(ValueError):
+        model.set_sort("Colour")
+    with pytest.raises(ValueError):
+        model.set_filter("Videos")
+
+
+def test_apply_changes(model, folder):
+    model.list_directory()
+    (folder / "new.txt").write_text("x")
+    os.remove(folder / "a.py")
+    assert names(model.apply_changes(["new.txt", "a.py"])) == ["docs", "b.txt", "c.png", "new.txt"]
+
+
+def test_navigation(model, folder):
+    model.navigate(str(folder / "docs"))
+    assert model.list_directory() == []
+    assert model.can_go_back
+    assert model.go_back() == str(folder)
+    assert not model.can_go_back
+    assert model.go_back() is None
+
+
+# Files and paste
+
+def test_create_and_rename(model, folder):
+    path = model.create_file("new.txt")
+    with pytest.raises(FileExistsError):
+        model.create_file("new.txt")
+    with pytest.raises(FileExistsError):
+        model.create_folder("new.txt")
+    model.set_clipboard([path], "copy")
+    renamed = model.rename(path, "renamed.txt")
+    assert renamed == str(folder / "renamed.txt")
+    assert model.clipboard_items == [renamed]
+
+
+def test_paste_copy_numbers_conflicting_names(model, folder):
+    model.set_clipboard([str(folder / "a.py"), str(folder / "docs")], "copy")
+    job = model.paste()
+    assert job.error is None
+    assert (folder / "a - Copy (1).py").read_bytes() == b"x" * 10
+    assert (folder / "docs - Copy (1)").is_dir()
+    assert model.clipboard_items == [str(folder / "a.py"), str(folder / "docs")]
+
+
+def test_paste_cut_moves_and_clears_the_clipboard(model, folder):
+    model.set_clipboard([str(folder / "a.py")], "cut")
+    model.navigate(str(folder / "docs"))
+    job = model.paste()
+    assert job.error is None
+    assert (folder / "docs" / "a.py").exists()
+    assert not (folder / "a.py").exists()
+    assert model.clipboard_items == []
+    assert model.clipboard_mode is None
+
+
+# Delete, undo and purge
+
+def test_delete_and_undo(model, folder):
+    job = model.delete([str(folder / "a.py"), str(folder / "docs")])
+    assert (job.unstaged, job.failures) == ([], [])
+    assert names(model.list_directory(use_cache=False)) == ["b.txt", "c.png"]
+    batch, restored, purged, failures = model.undo_delete()
+    assert sorted(restored) == [str(folder / "a.py"), str(folder / "docs")]
+    assert (purged, failures) == (0, [])
+    assert names(model.list_directory(use_cache=False)) == ["docs", "a.py", "b.txt", "c.png"]
+    assert model.undo_delete() is None
+
+
+def test_delete_forgets_clipboard_items(model, folder):
+    model.set_clipboard([str(folder / "a.py"), str(folder / "b.txt")], "cut")
+    model.delete([str(folder / "a.py")])
+    assert model.clipboard_items == [str(folder / "b.txt")]
+
+
+def test_undo_refuses_to_overwrite(model, folder):
+    model.delete([str(folder / "a.py")])
+    (folder / "a.py").write_text("new")
+    _, restored, _, failures = model.undo_delete()
+    assert restored == []
+    assert [path for path, _ in failures] == [str(folder / "a.py")]
+    assert (folder / "a.py").read_text() == "new"
+
+
+def test_purge_after_delete(folder, data_dir):
+    model = fm.FileSystemModel(str(folder), trash=fm.Trash(purge_delay=0), use_index=False)
+    (folder / "docs" / "inner.txt").write_text("x")
+    job = model.delete([str(folder / "docs")])
+    wait_for(lambda: job.entries[0].state == "purged")
+    assert os.listdir(data_dir / "trash") == []
+    assert model.trash.progress.files_removed == 1
+    assert model.undo_delete() is None
+
+
+def test_purge_now(model, folder, data_dir):
+    job = model.delete([str(folder / "a.py")])
+    model.trash.purge_now()
+    wait_for(lambda: job.entries[0].state == "purged")
+    assert os.listdir(data_dir / "trash") == []
+    assert model.undo_delete() is None
+
+
+def test_permanent_delete(model, folder, data_dir):
+    job = model.delete([str(folder / "docs")], permanent=True)
+    assert job.entries == []
+    assert not (folder / "docs").exists()
+    assert not os.path.exists(data_dir / "trash") or os.listdir(data_dir / "trash") == []
+
+
+def test_delete_without_a_usable_trash(model, folder, monkeypatch):
+    rename = os.rename
+
+    def cross_device(src, dst):
+        if os.path.dirname(dst) == fm.TRASH_DIR:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        return rename(src, dst)
+    monkeypatch.setattr(os, "rename", cross_device)
+    job = model.delete([str(folder / "a.py")])
+    assert job.unstaged == [str(folder / "a.py")]
+    assert (folder / "a.py").exists()
+
+
+def test_purge_leftovers_waits_for_the_undo_window(data_dir):
+    trash_dir = data_dir / "trash"
+    trash_dir.mkdir()
+    old = trash_dir / f"{time.time_ns() - 3600 * 10**9}-old.txt"
+    recent = trash_dir / f"{time.time_ns()}-recent.txt"
+    unnamed = trash_dir / "no-timestamp"
+    for path in (old, recent, unnamed):
+        path.write_text("x")
+    trash = fm.Trash()
+    trash.purge_leftovers()
+    wait_for(lambda: not old.exists() and not unnamed.exists())
+    time.sleep(0.2)
+    assert recent.exists()
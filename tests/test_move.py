@@ -0,0 +1,116 @@
+import os
+import shutil
+
+import pytest
+
+import FileManager as fm
+
+
+class Crash(Exception):
+    """Stands in for the process dying between the copy and delete phases."""
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "src"
+    (source / "sub").mkdir(parents=True)
+    (source / "a.txt").write_text("alpha")
+    (source / "sub" / "b.txt").write_text("beta")
+    os.symlink("a.txt", source / "link")
+    return source, tmp_path / "dst"
+
+
+def interrupted_move(source, target, monkeypatch):
+    """Copies source to target through a journal and 'crashes' before anything is deleted."""
+    def crash(path):
+        raise Crash()
+    journal = fm.MoveJournal.create(str(source), str(target))
+    with monkeypatch.context() as m:
+        m.setattr(fm, "_sync_tree", crash)
+        with pytest.raises(Crash):
+            fm.resume_move(journal)
+    [pending] = fm.MoveJournal.pending()
+    return pending
+
+
+def test_journaled_move(tree):
+    source, target = tree
+    fm.resume_move(fm.MoveJournal.create(str(source), str(target)))
+    assert not source.exists()
+    assert (target / "a.txt").read_text() == "alpha"
+    assert (target / "sub" / "b.txt").read_text() == "beta"
+    assert os.readlink(target / "link") == "a.txt"
+    assert fm.MoveJournal.pending() == []
+
+
+def test_move_refuses_existing_target(tree):
+    source, target = tree
+    target.mkdir()
+    with pytest.raises(FileExistsError):
+        fm.move_item(str(source), str(target))
+    assert (source / "a.txt").exists()
+
+
+def test_resume_interrupted_move(tree, monkeypatch):
+    source, target = tree
+    journal = interrupted_move(source, target, monkeypatch)
+    assert journal.phase == "copy"
+    assert set(journal.copied) == {"a.txt", os.path.join("sub", "b.txt"), "link"}
+    fm.resume_move(journal)
+    assert not source.exists()
+    assert (target / "sub" / "b.txt").read_text() == "beta"
+    assert fm.MoveJournal.pending() == []
+
+
+def test_rollback_interrupted_move(tree, monkeypatch):
+    source, target = tree
+    fm.rollback_move(interrupted_move(source, target, monkeypatch))
+    assert not target.exists()
+    assert (source / "a.txt").read_text() == "alpha"
+    assert fm.MoveJournal.pending() == []
+
+
+def test_rollback_keeps_a_target_the_move_did_not_create(tree):
+    source, target = tree
+    journal = fm.MoveJournal.create(str(source), str(target))
+    target.mkdir()
+    (target / "theirs.txt").write_text("not ours")
+    with pytest.raises(FileExistsError):
+        fm.resume_move(journal)
+    fm.rollback_move(fm.MoveJournal.load(journal.path))
+    assert (target / "theirs.txt").read_text() == "not ours"
+    assert (source / "a.txt").exists()
+
+
+def test_resume_copies_source_edits_made_after_the_copy(tree, monkeypatch):
+    source, target = tree
+    journal = interrupted_move(source, target, monkeypatch)
+    (source / "a.txt").write_text("alpha, edited after the copy")
+    os.remove(source / "sub" / "b.txt")
+    (source / "sub" / "b.txt").write_text("beta") # Same size and contents, new inode
+    fm.resume_move(journal)
+    assert not source.exists()
+    assert (target / "a.txt").read_text() == "alpha, edited after the copy"
+    assert (target / "sub" / "b.txt").read_text() == "beta"
+
+
+def test_resume_single_file_after_edit(tmp_path, monkeypatch):
+    source, target = tmp_path / "f.txt", tmp_path / "g.txt"
+    source.write_text("one")
+    journal = interrupted_move(source, target, monkeypatch)
+    source.write_text("two, longer")
+    fm.resume_move(journal)
+    assert not source.exists()
+    assert target.read_text() == "two, longer"
+
+
+def test_failed_recopy_keeps_source_and_journal(tree, monkeypatch):
+    source, target = tree
+    journal = interrupted_move(source, target, monkeypatch)
+    (source / "a.txt").write_text("edited")
+    monkeypatch.setattr(fm, "files_match", lambda a, b: False)
+    with pytest.raises(shutil.Error):
+        fm.resume_move(journal)
+    assert (source / "a.txt").read_text() == "edited"
+    assert not (source / "sub").exists()
+    assert len(fm.MoveJournal.pending()) == 1
@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pytest
+
+import FileManager as fm
+
+
+def make_tree(root):
+    for folder in ("a", "a/deep", "b", "c"):
+        (root / folder).mkdir(parents=True)
+        for i in range(3):
+            (root / folder / f"f{i}.txt").write_text(folder)
+    os.symlink(root / "c", root / "b" / "dirlink")
+
+
+def remaining_files(root):
+    return [os.path.join(folder, name) for folder, _, files in os.walk(root) for name in files]
+
+
+def test_purge_tree(tmp_path):
+    root = tmp_path / "tree"
+    make_tree(root)
+    progress = fm.PurgeProgress()
+    fm.purge_tree(str(root), progress, workers=2)
+    assert not root.exists()
+    assert (progress.files_removed, progress.dirs_removed, progress.errors) == (13, 5, 0)
+
+
+def test_purge_tree_single_file(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("x")
+    fm.purge_tree(str(path))
+    assert not path.exists()
+
+
+def test_purge_tree_continues_past_a_folder_symlink_it_cannot_remove(tmp_path, monkeypatch):
+    root = tmp_path / "tree"
+    make_tree(root)
+    unlink = os.unlink
+
+    def refuse_dirlink(path, *args, dir_fd=None):
+        if path == "dirlink":
+            raise PermissionError(1, "Operation not permitted", path)
+        return unlink(path, *args, dir_fd=dir_fd)
+    monkeypatch.setattr(os, "supports_dir_fd", os.supports_dir_fd | {refuse_dirlink})
+    monkeypatch.setattr(os, "unlink", refuse_dirlink)
+    progress = fm.PurgeProgress()
+    with pytest.raises(OSError): # The top folder still holds b/dirlink
+        fm.purge_tree(str(root), progress, workers=2)
+    assert remaining_files(root) == [str(root / "b" / "dirlink")]
+    assert progress.errors == 2 # b/dirlink, then b itself
+    assert sorted(os.listdir(root)) == ["b"]
+
+
+def test_purge_tree_rmtree_fallback(tmp_path, monkeypatch):
+    root = tmp_path / "tree"
+    make_tree(root)
+    monkeypatch.delattr(os, "fwalk")
+    rmtree = shutil.rmtree
+    calls = []
+
+    def record(path, **kwargs):
+        calls.append(sorted(kwargs))
+        return rmtree(path, **kwargs)
+    monkeypatch.setattr(shutil, "rmtree", record)
+    fm.purge_tree(str(root))
+    assert not root.exists()
+    assert calls == [["onexc" if fm.sys.version_info >= (3, 12) else "onerror"]]
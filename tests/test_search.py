@@ -0,0 +1,64 @@
+import os
+import time
+
+import pytest
+
+import FileManager as fm
+
+
+@pytest.fixture
+def indexed_model(tmp_path, data_dir):
+    root = tmp_path / "root"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "report.txt").write_text("x")
+    (root / "notes.md").write_text("x")
+    model = fm.FileSystemModel(str(root), trash=fm.Trash(), use_index=False)
+    model.file_index = fm.FilenameIndex(str(data_dir / "index.db"))
+    model.file_index.update(str(root))
+    return model, root
+
+
+def age_index(model, root, seconds):
+    conn = model.file_index._connect()
+    with conn:
+        conn.execute("UPDATE roots SET updated_at = ? WHERE path = ?", (time.time() - seconds, str(root)))
+    conn.close()
+
+
+def test_find_walks_without_an_index(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "a" / "report.txt").write_text("x")
+    matches, indexed = fm.FileSystemModel(str(tmp_path), use_index=False).find("report")
+    assert indexed is None
+    assert list(matches) == [(str(tmp_path / "a" / "report.txt"), False)]
+
+
+def test_find_exact_from_index(indexed_model):
+    model, root = indexed_model
+    matches, indexed = model.find("report.txt", exact=True)
+    assert indexed[0] == str(root)
+    assert list(matches) == [(str(root / "sub" / "report.txt"), False)]
+
+
+def test_find_refreshes_a_stale_index(indexed_model):
+    model, root = indexed_model
+    (root / "sub" / "new-report.txt").write_text("x")
+    age_index(model, root, fm.INDEX_REFRESH_SECONDS + 1)
+    matches, indexed = model.find("new-report")
+    assert [path for path, _ in matches] == [str(root / "sub" / "new-report.txt")]
+    assert time.time() - indexed[1] < fm.INDEX_REFRESH_SECONDS
+
+
+def test_find_keeps_a_recent_index(indexed_model):
+    model, root = indexed_model
+    (root / "new-report.txt").write_text("x")
+    matches, _ = model.find("new-report")
+    assert list(matches) == [] # Within INDEX_REFRESH_SECONDS the index answers as it is
+
+
+def test_search_refreshes_a_stale_index(indexed_model):
+    model, root = indexed_model
+    os.remove(root / "notes.md")
+    (root / "more-notes.md").write_text("x")
+    age_index(model, root, fm.INDEX_REFRESH_SECONDS + 1)
+    assert [entry.name for entry in model.search("notes")] == ["more-notes.md"]